@@ -1,6 +1,7 @@
 """Agent manager - handles Azure AI Agent operations."""
 
 import logging
+from functools import lru_cache
 from azure.ai.projects import AIProjectClient
 from azure.identity import DefaultAzureCredential
 from azure.ai.agents.models import McpTool, ToolApproval, RequiredMcpToolCall
@@ -9,6 +10,18 @@ from .run_events import RequiresApprovalEvent
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=None)
+def get_credential() -> DefaultAzureCredential:
+    """Return the process-wide credential so the credential chain is probed once."""
+    return DefaultAzureCredential()
+
+
+@lru_cache(maxsize=None)
+def get_project_client(project_endpoint: str) -> AIProjectClient:
+    """Return a shared project client per endpoint so its connection pool is reused."""
+    return AIProjectClient(project_endpoint, get_credential())
+
+
 class AgentManager:
     """Manages Azure AI Agent operations including MCP setup and approvals."""
     
@@ -19,11 +32,13 @@ class AgentManager:
         self.mcp_token = mcp_token
         
         # Initialize clients
-        self.client = AIProjectClient(project_endpoint, DefaultAzureCredential())
+        self.client = get_project_client(project_endpoint)
         self.agents_client = self.client.agents
         
         # Setup MCP tool
         self.mcp_tool = self._setup_mcp_tool()
+        self._tool_resources = None  # Resolved on first run, reset on token refresh
+        self._run_headers = self._build_run_headers()
         self.thread_id = self.create_thread() if thread_id is None else thread_id
     
     def _setup_mcp_tool(self) -> McpTool:
@@ -41,30 +56,51 @@ class AgentManager:
         
         return mcp_tool
     
+    def _build_run_headers(self) -> dict:
+        """Build the request headers sent with each run."""
+        headers = {}
+        if self.mcp_token:
+            headers["Authorization"] = f"Bearer {self.mcp_token}"
+        return headers
+    
+    def update_mcp_token(self, mcp_token: str) -> None:
+        """Swap in a refreshed MCP token for subsequent runs and approvals."""
+        self.mcp_token = mcp_token
+        self.mcp_tool.update_headers("authorization", f"bearer {mcp_token}")
+        self._run_headers = self._build_run_headers()
+        # Resources carry the tool headers, so rebuild them with the new token
+        self._tool_resources = None
+    
+    def _get_tool_resources(self):
+        """Get MCP tool resources, resolving them once per MCP token."""
+        if self._tool_resources is not None:
+            return self._tool_resources
+        
+        # Get tool resources if MCP is available
+        if not (self.mcp_config and self.mcp_token):
+            return []
+        
+        try:
+            self._tool_resources = self.mcp_tool.resources
+            logger.info(f"MCP tool initialized with {len(self._tool_resources)} resources")
+        except Exception as e:
+            logger.error(f"Failed to initialize MCP tool: {e}")
+        
+        return self._tool_resources if self._tool_resources is not None else []
+    
     def create_run(self, message: str) -> str:
         """Create a run and return run_id."""
         # Create user message
         self.agents_client.messages.create(thread_id=self.thread_id, role="user", content=message)
         
-        # Get tool resources if MCP is available
-        tool_resources = []
-        if self.mcp_config and self.mcp_token:
-            try:
-                tool_resources = self.mcp_tool.resources
-                logger.info(f"MCP tool initialized with {len(tool_resources)} resources")
-            except Exception as e:
-                logger.error(f"Failed to initialize MCP tool: {e}")
-        
-        # Create run with MCP headers
-        headers = {}
-        if self.mcp_token:
-            headers["Authorization"] = f"Bearer {self.mcp_token}"
+        tool_resources = self._get_tool_resources()
         
+        # Create run with MCP headers (rebuilt only when the token changes)
         run = self.agents_client.runs.create(
             thread_id=self.thread_id,
             agent_id=self.agent_id,
             instructions="You are a helpful assistant, you will respond to the user's message and you will use the tools provided to you to help the user. You will justify what tools you are going to use before requesting them.",
-            headers=headers,
+            headers=self._run_headers,
             tool_resources=tool_resources
         )
         
@@ -73,20 +109,25 @@ class AgentManager:
     
     def submit_approvals(self, event: RequiresApprovalEvent, approved: bool) -> bool:
         """Submit tool approvals to Azure AI Foundry."""
+        # Only MCP tool calls need approval - nothing to submit otherwise
+        mcp_calls = [tc for tc in event.tool_calls if isinstance(tc, RequiredMcpToolCall)]
+        if not mcp_calls:
+            return False
+        
         try:
+            mcp_headers = self.mcp_tool.headers
             tool_approvals = []
-            for tool_call in event.tool_calls:
-                if isinstance(tool_call, RequiredMcpToolCall):
-                    try:
-                        tool_approvals.append(
-                            ToolApproval(
-                                tool_call_id=tool_call.id,
-                                approve=approved,
-                                headers=self.mcp_tool.headers,
-                            )
+            for tool_call in mcp_calls:
+                try:
+                    tool_approvals.append(
+                        ToolApproval(
+                            tool_call_id=tool_call.id,
+                            approve=approved,
+                            headers=mcp_headers,
                         )
-                    except Exception as e:
-                        logger.error(f"Error creating approval for {tool_call.id}: {e}")
+                    )
+                except Exception as e:
+                    logger.error(f"Error creating approval for {tool_call.id}: {e}")
             
             if tool_approvals:
                 logger.info(f"Submitting {len(tool_approvals)} tool approvals (approved={approved})")
@@ -6,10 +6,12 @@ from .constants import (
     PROJ_ENDPOINT_KEY, AGENT_ID_KEY, AZURE_AI_FOUNDRY_SECRETS_KEY,
     ENV_SECRETS_KEY, AZURE_CLIENT_ID_KEY, AZURE_CLIENT_SECRET_KEY,
     AZURE_TENANT_ID_KEY, AUTHORITY_BASE_URL, MCP_SECRETS_KEY,
-    MCP_CLIENT_ID_KEY, MCP_CLIENT_SECRET_KEY, MCP_SERVER_LABEL_KEY
+    MCP_CLIENT_ID_KEY, MCP_CLIENT_SECRET_KEY, MCP_SERVER_LABEL_KEY,
+    CONFIG_CACHE_TTL_SECONDS
 )
 
 
+@st.cache_data(ttl=CONFIG_CACHE_TTL_SECONDS, show_spinner=False)
 def get_config() -> Optional[Dict[str, str]]:
     """Get configuration from Streamlit secrets.
     
@@ -37,7 +39,13 @@ def get_config() -> Optional[Dict[str, str]]:
 
 
 def setup_environment_variables() -> None:
-    """Set up environment variables for DefaultAzureCredential."""
+    """Set up environment variables for DefaultAzureCredential.
+    
+    Runs once per session; later reruns skip the secrets lookup.
+    """
+    if st.session_state.get("env_ready"):
+        return
+    
     try:
         env_config = st.secrets[ENV_SECRETS_KEY]
         import os
@@ -46,8 +54,11 @@ def setup_environment_variables() -> None:
         os.environ[AZURE_TENANT_ID_KEY] = env_config.get(AZURE_TENANT_ID_KEY, "")
     except KeyError:
         pass  # No environment variables found
+    
+    st.session_state.env_ready = True
 
 
+@st.cache_data(ttl=CONFIG_CACHE_TTL_SECONDS, show_spinner=False)
 def get_auth_config() -> tuple[Optional[str], Optional[str], Optional[str]]:
     """Get authentication configuration from environment variables.
     
@@ -68,6 +79,7 @@ def get_auth_config() -> tuple[Optional[str], Optional[str], Optional[str]]:
     return client_id, tenant_id, authority
 
 
+@st.cache_data(ttl=CONFIG_CACHE_TTL_SECONDS, show_spinner=False)
 def get_mcp_config() -> Optional[Dict[str, str]]:
     """Get MCP configuration from Streamlit secrets.
     
@@ -16,9 +16,13 @@ ENV_SECRETS_KEY = "env"
 # Authentication
 AUTHORITY_BASE_URL = "https://login.microsoftonline.com"
 
+# Caching
+CONFIG_CACHE_TTL_SECONDS = 3600
+
 # Polling configuration
 MAX_POLL_ATTEMPTS = 60
 POLL_INTERVAL_SECONDS = 1
+MIN_POLL_INTERVAL_SECONDS = 0.25  # First poll delay; doubles up to the poll interval
 
 # Message roles
 USER_ROLE = "user"
@@ -35,10 +39,14 @@ RUN_STATUS_CANCELLED = "cancelled"
 RUN_STATUS_EXPIRED = "expired"
 
 # UI settings
-DEFAULT_TYPING_DELAY = 0.02  # Delay between characters in seconds
+TYPING_CHAR_DELAY = 0.002  # Delay between characters in the typewriter effect
+MAX_TYPING_SECONDS = 1.0  # Upper bound on typewriter duration for long messages
+RENDER_FLUSH_INTERVAL = 0.05  # Minimum time between placeholder updates in seconds
 
 # MCP Configuration
 MCP_SERVER_LABEL_KEY = "mcp_server_label"
 MCP_CLIENT_ID_KEY = "mcp_client_id"
 MCP_CLIENT_SECRET_KEY = "mcp_client_secret"
 MCP_SECRETS_KEY = "mcp"
+DEFAULT_TOKEN_LIFETIME_SECONDS = 3600  # Used when the token response has no expires_in
+MCP_TOKEN_REFRESH_MARGIN_SECONDS = 300  # Refresh the MCP token this long before it expires
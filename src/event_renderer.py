@@ -1,39 +1,19 @@
 """Event renderer - handles UI display for run events."""
 
 import streamlit as st
-import json
 import logging
 import time
-from typing import Optional, Callable
+from typing import Callable
+from .constants import TYPING_CHAR_DELAY, MAX_TYPING_SECONDS, RENDER_FLUSH_INTERVAL
 from .run_events import (
-    RunEvent, MessageEvent, ToolCallEvent, ToolCallsStepEvent,
+    UserMessage, RunEvent, MessageEvent, ToolCallEvent, ToolCallsStepEvent,
     RequiresApprovalEvent, RunCompletedEvent, ErrorEvent
 )
 
 logger = logging.getLogger(__name__)
 
-
-def parse_tool_output(output: Optional[str]) -> tuple[bool, any]:
-    """
-    Parse tool output - try JSON first, fallback to text.
-    Returns: (is_json, parsed_data)
-    """
-    if not output:
-        return False, None
-    
-    try:
-        # Try to extract JSON after "TOOL RESULT:" marker
-        if 'TOOL RESULT:' in output:
-            json_part = output.split('TOOL RESULT:')[1].strip()
-            result = json.loads(json_part)
-            return True, result
-        else:
-            # Try direct JSON parse
-            result = json.loads(output)
-            return True, result
-    except:
-        # Return as text
-        return False, output
+# Event types worth re-mounting when the history is replayed
+HISTORY_EVENT_TYPES = frozenset({"message", "tool_calls_step"})
 
 
 class EventRenderer:
@@ -61,7 +41,7 @@ class EventRenderer:
             EventRenderer.render_error(event)
         
         else:
-            logger.warning(f"Unknown event type: {type(event)}")
+            logger.warning("Unknown event type: %s", type(event))
     
     @staticmethod
     def render_tool_call(event: ToolCallEvent):
@@ -83,17 +63,23 @@ class EventRenderer:
         if not isinstance(event, MessageEvent):
             return
         
+        content = event.content
         placeholder = st.empty()
-        displayed_text = ""
-        
-        for char in event.content:
-            displayed_text += char
-            placeholder.markdown(displayed_text + "▌")  # Add cursor
-            time.sleep(0.002)
-        
-        # Clear placeholder and render final text normally
-        placeholder.empty()
-        st.markdown(event.content)
+        # Cap the artificial typing latency regardless of message length
+        char_delay = min(TYPING_CHAR_DELAY, MAX_TYPING_SECONDS / max(len(content), 1))
+        start = time.monotonic()
+        shown = 0
+        
+        while shown < len(content):
+            # Wake once per flush interval, not per character, and reveal
+            # however many characters the elapsed time allows.
+            # Plain text while typing; markdown is parsed once the text settles.
+            time.sleep(RENDER_FLUSH_INTERVAL)
+            shown = int((time.monotonic() - start) / char_delay)
+            placeholder.text(content[:shown] + "▌")  # Add cursor
+        
+        # Render final text as markdown in place
+        placeholder.markdown(content)
     
     @staticmethod
     def render_tool_calls_step(event: ToolCallsStepEvent):
@@ -124,7 +110,7 @@ class EventRenderer:
             
             # Output/Result
             if tool_call.output:
-                is_json, parsed = parse_tool_output(tool_call.output)
+                is_json, parsed = tool_call.parsed_output
                 
                 if is_json:
                     EventRenderer._render_structured_output(parsed)
@@ -148,12 +134,12 @@ class EventRenderer:
                 if 'error' in result:
                     st.error(f"**Error:** {result['error']}")
         
-        # Always show raw data
+        # Always show raw data; collapse the JSON tree so large results stay cheap
         with st.expander("📊 Result Data", expanded=True):
-            if isinstance(result, dict):
-                st.json(result)
+            if isinstance(result, (dict, list)):
+                st.json(result, expanded=False)
             else:
-                st.markdown(str(result))
+                st.text(result)
     
     @staticmethod
     def render_approval_request(event: RequiresApprovalEvent, 
@@ -179,7 +165,7 @@ class EventRenderer:
     @staticmethod
     def render_completion(event: RunCompletedEvent):
         """Render run completion - just logging."""
-        logger.info(f"✅ Run {event.run_id} completed")
+        logger.info("✅ Run %s completed", event.run_id)
     
     @staticmethod
     def render_error(event: ErrorEvent):
@@ -208,6 +194,19 @@ class EventRenderer:
             """)
 
 
+def render_message_history(messages: list):
+    """Render chat history: user messages and displayable run events."""
+    for item in messages:
+        if item.__class__ is UserMessage:
+            # User message - tagged tuple, checked by exact type
+            with st.chat_message(item.role):
+                st.markdown(item.content)
+        elif item.event_type in HISTORY_EVENT_TYPES:
+            # Assistant event - RunEvent object
+            with st.chat_message("assistant"):
+                EventRenderer.render(item)
+
+
 def render_approval_buttons(event: RequiresApprovalEvent, 
                            on_approve: Callable, 
                            on_deny: Callable):
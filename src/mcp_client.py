@@ -1,17 +1,22 @@
 """MCP Token Client for Azure AI Foundry Agent integration."""
 
 import logging
+import time
 import requests
-from typing import Optional, Dict
+from typing import Optional, Dict, Tuple
 import streamlit as st
 
 from .constants import (
     MCP_CLIENT_ID_KEY, MCP_CLIENT_SECRET_KEY,
-    AZURE_TENANT_ID_KEY, AUTHORITY_BASE_URL
+    AZURE_TENANT_ID_KEY, AUTHORITY_BASE_URL, DEFAULT_TOKEN_LIFETIME_SECONDS,
+    MCP_TOKEN_REFRESH_MARGIN_SECONDS
 )
 
 logger = logging.getLogger(__name__)
 
+# Process-wide token cache: (client_id, tenant_id) -> (access_token, expires_on)
+_token_cache: Dict[Tuple[str, str], Tuple[str, float]] = {}
+
 
 def get_mcp_token_sync(config: Dict[str, str]) -> Optional[str]:
     """
@@ -23,14 +28,36 @@ def get_mcp_token_sync(config: Dict[str, str]) -> Optional[str]:
     Returns:
         Access token string or None if failed
     """
+    token, _ = get_mcp_token_with_expiry(config)
+    return token
+
+
+def get_mcp_token_with_expiry(config: Dict[str, str]) -> Tuple[Optional[str], float]:
+    """
+    Get MCP access token together with its expiry time.
+    
+    Tokens are cached per client and tenant, and reused until they are
+    within MCP_TOKEN_REFRESH_MARGIN_SECONDS of expiring.
+    
+    Args:
+        config: MCP configuration dictionary
+        
+    Returns:
+        Tuple of (access token or None, expiry as a time.time() timestamp)
+    """
     if not config:
-        return None
+        return None, 0.0
     
     try:
         client_id = config[MCP_CLIENT_ID_KEY]
         client_secret = config[MCP_CLIENT_SECRET_KEY]
         tenant_id = config[AZURE_TENANT_ID_KEY]
         
+        cache_key = (client_id, tenant_id)
+        cached = _token_cache.get(cache_key)
+        if cached and cached[1] - time.time() > MCP_TOKEN_REFRESH_MARGIN_SECONDS:
+            return cached
+        
         # Construct OAuth endpoint
         token_endpoint = f"{AUTHORITY_BASE_URL}/{tenant_id}/oauth2/token"
         
@@ -60,20 +87,22 @@ def get_mcp_token_sync(config: Dict[str, str]) -> Optional[str]:
             
             if access_token:
                 logger.info("Successfully obtained MCP access token")
-                return access_token
+                expires_on = time.time() + float(token_data.get('expires_in', DEFAULT_TOKEN_LIFETIME_SECONDS))
+                _token_cache[cache_key] = (access_token, expires_on)
+                return access_token, expires_on
             else:
                 logger.error("No access token in response")
-                return None
+                return None, 0.0
         else:
             logger.error(f"Failed to get access token. Status: {response.status_code}, Error: {response.text}")
-            return None
+            return None, 0.0
             
     except requests.Timeout:
         logger.error("Timeout while getting MCP access token")
-        return None
+        return None, 0.0
     except Exception as e:
         logger.error(f"Error getting MCP access token: {e}")
-        return None
+        return None, 0.0
 
 
 def display_mcp_status(config: Optional[Dict[str, str]], token: Optional[str]) -> None:
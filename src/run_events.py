@@ -1,11 +1,43 @@
 """Run events - abstraction for agent execution events."""
 
-from typing import Optional, Any, Literal
+from typing import Optional, Any, NamedTuple
 import logging
+import orjson
 
 logger = logging.getLogger(__name__)
 
 
+def parse_tool_output(output: Optional[str]) -> tuple[bool, Any]:
+    """
+    Parse tool output - try JSON first, fallback to text.
+    Returns: (is_json, parsed_data)
+    """
+    if not output:
+        return False, None
+    
+    # Try to extract JSON after "TOOL RESULT:" marker, else parse directly
+    _, marker, json_part = output.partition('TOOL RESULT:')
+    candidate = json_part.strip() if marker else output.lstrip()
+    
+    # Plain log lines can't be JSON - skip the parse and its exception
+    if not candidate or candidate[0] not in '{["':
+        return False, output
+    
+    try:
+        result = orjson.loads(candidate)
+        return True, result
+    except:
+        # Return as text
+        return False, output
+
+
+class UserMessage(NamedTuple):
+    """User message stored in chat history alongside run events."""
+    
+    role: str
+    content: str
+
+
 class RunEvent:
     """Base class for all run events."""
     
@@ -41,7 +73,8 @@ class ToolCallEvent(RunEvent):
     
     def __init__(self, tool_id: str, tool_name: str, tool_type: str, 
                  server_label: Optional[str], arguments: dict, 
-                 output: Optional[str], status: str):
+                 output: Optional[str], status: str,
+                 parsed_output: Optional[tuple[bool, Any]] = None):
         super().__init__(
             event_id=f"tool_{tool_id}",
             event_type="tool_call",
@@ -54,6 +87,8 @@ class ToolCallEvent(RunEvent):
         self.arguments = arguments
         self.output = output
         self.status = status
+        # Parsed once per event so history re-renders reuse it
+        self.parsed_output = parse_tool_output(output) if parsed_output is None else parsed_output
 
 
 class ToolCallsStepEvent(RunEvent):
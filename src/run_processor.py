@@ -1,17 +1,29 @@
 """Run processor - converts polling into event stream."""
 
+import asyncio
 import logging
+import threading
 import time
 import json
-from typing import Generator, Optional
+from typing import AsyncGenerator, Generator, Optional
 from azure.ai.agents.models import SubmitToolApprovalAction
+from .constants import MIN_POLL_INTERVAL_SECONDS
 from .run_events import (
     RunEvent, MessageEvent, ToolCallEvent, ToolCallsStepEvent,
-    RequiresApprovalEvent, RunStatusEvent, RunCompletedEvent, ErrorEvent
+    RequiresApprovalEvent, RunCompletedEvent, ErrorEvent
 )
 
 logger = logging.getLogger(__name__)
 
+ACTIVE_RUN_STATUSES = frozenset({"queued", "in_progress"})
+PENDING_RUN_STATUSES = ACTIVE_RUN_STATUSES | {"requires_action"}
+
+
+def _log_worker_error(future: asyncio.Future) -> None:
+    """Log a polling worker failure so it isn't lost when nobody awaits the worker."""
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Polling worker failed: %s", future.exception())
+
 
 class RunProcessor:
     """Processes agent run and yields events."""
@@ -19,27 +31,40 @@ class RunProcessor:
     def __init__(self, agents_client):
         self.agents_client = agents_client
         self.seen_events = set()  # For deduplication
+        self.seen_steps = set()  # Completed steps already turned into events
         self.is_blocked = False  # Track if we're waiting for approval
         self.blocked_event = None  # Store blocking event
+        self._poll_stop = None  # Stop flag of the current async polling worker
+        self._poll_worker = None  # Future of the current async polling worker
     
     def unblock(self):
         """Unblock processor after approval is submitted."""
-        logger.info(f"🔓 Unblocking processor")
+        logger.info("🔓 Unblocking processor")
         self.is_blocked = False
         self.blocked_event = None
     
     def poll_run_events(self, thread_id: str, run_id: str, 
-                       poll_interval: float = 1.0) -> Generator[RunEvent, None, None]:
+                       poll_interval: float = 1.0,
+                       stop: Optional[threading.Event] = None) -> Generator[RunEvent, None, None]:
         """
         Poll run and yield events as they become ready.
         
         Events are yielded with ALL data loaded (messages fetched, tools complete, etc).
         Blocking events (requires_approval) will stop the stream until handled externally.
+        Polls back off exponentially from MIN_POLL_INTERVAL_SECONDS up to poll_interval,
+        and drop back to the minimum whenever the run makes progress.
+        Polling ends early once the optional stop event is set.
         """
-        while True:
+        delay = MIN_POLL_INTERVAL_SECONDS
+        last_status = None
+        while stop is None or not stop.is_set():
             try:
+                seen_before = len(self.seen_steps)
                 run = self.agents_client.runs.get(thread_id=thread_id, run_id=run_id)
-                logger.info(f"Run status: {run.status}")
+                if run.status != last_status:
+                    logger.info("Run status: %s", run.status)
+                    last_status = run.status
+                    delay = MIN_POLL_INTERVAL_SECONDS
                 
                 # Check for approval requirement
                 if run.status == "requires_action" and isinstance(run.required_action, SubmitToolApprovalAction):
@@ -52,32 +77,32 @@ class RunProcessor:
                     # Only yield once, then exit
                     if event.event_id not in self.seen_events:
                         # FIRST: Process any completed steps before showing approval
-                        logger.info(f"🔒 Approval required - processing completed steps first")
+                        logger.info("🔒 Approval required - processing completed steps first")
                         yield from self._process_steps(thread_id, run_id)
                         
                         # THEN: Yield approval event
                         self.seen_events.add(event.event_id)
                         self.is_blocked = True
                         self.blocked_event = event
-                        logger.info(f"🔒 Yielding blocking event: approval required")
+                        logger.info("🔒 Yielding blocking event: approval required")
                         yield event
                         # Exit generator - will resume after unblock()
                         return
                     else:
                         # Already seen this approval event, just continue polling
                         # Run will change from requires_action to in_progress after approval is processed
-                        logger.info(f"⏭️ Skipping already-seen approval event, continuing polling...")
+                        logger.info("⏭️ Skipping already-seen approval event, continuing polling...")
                         # Don't return - continue to next iteration
                 
                 # Process steps for in-progress runs
-                if run.status in ["in_progress", "queued"]:
+                if run.status in ACTIVE_RUN_STATUSES:
                     yield from self._process_steps(thread_id, run_id)
                 
                 # Terminal states
-                if run.status not in ["queued", "in_progress", "requires_action"]:
+                if run.status not in PENDING_RUN_STATUSES:
                     # Final sweep - process any remaining completed steps
                     # This handles race conditions where steps complete after we last polled
-                    logger.info(f"🏁 Run finished with status {run.status}, doing final sweep")
+                    logger.info("🏁 Run finished with status %s, doing final sweep", run.status)
                     yield from self._process_steps(thread_id, run_id)
                     
                     # Yield completion event
@@ -85,25 +110,35 @@ class RunProcessor:
                         event = RunCompletedEvent(run_id=run.id)
                         if event.event_id not in self.seen_events:
                             self.seen_events.add(event.event_id)
-                            logger.info(f"✅ Run completed successfully")
+                            logger.info("✅ Run completed successfully")
                             yield event
                     elif run.status == "failed":
-                        error_info = getattr(run, 'last_error', {})
+                        error_info = run.last_error or {}
                         error_msg = error_info.get('message', 'Run failed')
-                        error_code = error_info.get('code', None)
+                        error_code = error_info.get('code')
                         
                         # Add more context to error message
                         enhanced_msg = f"Run failed: {error_msg}"
                         if error_code:
                             enhanced_msg += f" (Code: {error_code})"
                         
-                        logger.error(f"❌ Run failed: {enhanced_msg}")
+                        logger.error("❌ Run failed: %s", enhanced_msg)
                         yield ErrorEvent(error_message=enhanced_msg, error_code=error_code)
                     
                     # Exit the polling loop
                     return
                 
-                time.sleep(poll_interval)
+                # New steps mean the run is active - poll again soon
+                if len(self.seen_steps) != seen_before:
+                    delay = MIN_POLL_INTERVAL_SECONDS
+                delay = min(poll_interval, delay)
+                if stop is not None:
+                    if stop.wait(delay):
+                        return
+                else:
+                    time.sleep(delay)
+                # Double the delay directly so it stays bounded however long the run idles
+                delay = min(poll_interval, delay * 2)
                 
             except Exception as e:
                 error_msg = f"Error polling run: {str(e)}"
@@ -111,65 +146,113 @@ class RunProcessor:
                 yield ErrorEvent(error_message=error_msg)
                 return
     
+    async def poll_run_events_async(self, thread_id: str, run_id: str,
+                                    poll_interval: float = 1.0) -> AsyncGenerator[RunEvent, None]:
+        """
+        Async variant of poll_run_events for use inside the workflow event loop.
+        
+        Polling runs on a worker thread that pushes events into an asyncio.Queue,
+        so HTTP calls and poll sleeps never block the loop. The worker stops as
+        soon as the consumer does, e.g. when a Streamlit rerun interrupts it.
+        """
+        # An interrupted consumer may leave its worker mid-poll - stop it and
+        # wait, so the seen sets never have two writers
+        if self._poll_worker is not None:
+            self._poll_stop.set()
+            await asyncio.wait([self._poll_worker])
+        
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        done = object()
+        stop = threading.Event()
+        
+        def drain():
+            try:
+                for event in self.poll_run_events(thread_id, run_id, poll_interval, stop=stop):
+                    if stop.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, done)
+        
+        worker = loop.run_in_executor(None, drain)
+        worker.add_done_callback(_log_worker_error)
+        self._poll_stop, self._poll_worker = stop, worker
+        try:
+            while (event := await queue.get()) is not done:
+                yield event
+            await worker
+        finally:
+            stop.set()
+    
     def _process_steps(self, thread_id: str, run_id: str) -> Generator[RunEvent, None, None]:
         """Process run steps and yield events."""
         try:
             steps = self.agents_client.run_steps.list(thread_id=thread_id, run_id=run_id, order="asc")
             
             for step in steps:
-                step_type = getattr(step, 'type', 'unknown')
-                step_status = getattr(step, 'status', 'unknown')
-                step_id = getattr(step, 'id', 'unknown')
+                # RunStep models always carry these fields
+                step_type = step.type
+                step_status = step.status
+                step_id = step.id
                 
-                logger.info(f"🔍 Processing step: {step_id}, type={step_type}, status={step_status}")
+                # Completed steps never change - skip them without refetching anything
+                if step_id in self.seen_steps:
+                    continue
+                
+                logger.info("🔍 Processing step: %s, type=%s, status=%s", step_id, step_type, step_status)
                 
                 # Only process completed steps
                 if step_status != "completed":
-                    logger.info(f"⏭️ Skipping step {step_id} - not completed (status: {step_status})")
+                    logger.info("⏭️ Skipping step %s - not completed (status: %s)", step_id, step_status)
                     continue
                 
                 if step_type == "tool_calls":
                     event = self._create_tool_calls_event(step)
                     if event:
                         if event.event_id in self.seen_events:
-                            logger.info(f"⏭️ Skipping tool calls step {step_id} - already seen")
+                            logger.info("⏭️ Skipping tool calls step %s - already seen", step_id)
                         else:
                             # Check if all tool calls have output before yielding
                             all_have_output = all(tc.output for tc in event.tool_calls)
                             if all_have_output:
                                 self.seen_events.add(event.event_id)
-                                logger.info(f"✅ Yielding tool calls step: {step_id} with {len(event.tool_calls)} tool(s)")
+                                self.seen_steps.add(step_id)
+                                logger.info("✅ Yielding tool calls step: %s with %s tool(s)", step_id, len(event.tool_calls))
                                 yield event
                             else:
                                 # Output not ready - STOP processing steps to preserve order
                                 # Will retry in next poll iteration
-                                logger.info(f"⏳ Tool calls step {step_id} completed but output not ready yet")
-                                logger.info(f"🛑 Stopping step processing to preserve order, will retry in next poll")
+                                logger.info("⏳ Tool calls step %s completed but output not ready yet", step_id)
+                                logger.info("🛑 Stopping step processing to preserve order, will retry in next poll")
                                 return  # Exit _process_steps, will retry in next while loop iteration
+                    else:
+                        self.seen_steps.add(step_id)
                 
                 elif step_type == "message_creation":
                     event = self._create_message_event(thread_id, step)
                     if event:
+                        self.seen_steps.add(step_id)
                         if event.event_id in self.seen_events:
-                            logger.info(f"⏭️ Skipping message {event.message_id} - already seen")
+                            logger.info("⏭️ Skipping message %s - already seen", event.message_id)
                         else:
                             self.seen_events.add(event.event_id)
-                            logger.info(f"✅ Yielding message: {event.message_id}")
+                            logger.info("✅ Yielding message: %s", event.message_id)
                             yield event
                         
         except Exception as e:
-            logger.error(f"Error processing steps: {e}")
+            logger.error("Error processing steps: %s", e)
     
     def _create_tool_calls_event(self, step) -> Optional[ToolCallsStepEvent]:
         """Create tool calls step event with all data loaded."""
         try:
-            step_details = getattr(step, 'step_details', {})
+            step_details = step.step_details or {}
             if 'tool_calls' not in step_details:
-                logger.warning(f"Step {step.id} has no tool_calls in step_details")
+                logger.warning("Step %s has no tool_calls in step_details", step.id)
                 return None
             
             tool_calls_raw = step_details['tool_calls']
-            logger.info(f"🔧 Creating tool calls event for step {step.id} with {len(tool_calls_raw)} tool call(s)")
+            logger.info("🔧 Creating tool calls event for step %s with %s tool call(s)", step.id, len(tool_calls_raw))
             
             tool_call_events = []
             for idx, tool_call in enumerate(tool_calls_raw):
@@ -178,7 +261,7 @@ class RunProcessor:
                 tool_type = tool_call.get('type', 'unknown')
                 server_label = tool_call.get('server_label')
                 
-                logger.info(f"  Tool {idx+1}: {tool_name} (type={tool_type}, server={server_label})")
+                logger.info("  Tool %s: %s (type=%s, server=%s)", idx+1, tool_name, tool_type, server_label)
                 
                 # Parse arguments
                 arguments = {}
@@ -190,7 +273,7 @@ class RunProcessor:
                 
                 output = tool_call.get('output')
                 has_output = output is not None and output != ""
-                logger.info(f"    Has output: {has_output}")
+                logger.info("    Has output: %s", has_output)
                 
                 tool_event = ToolCallEvent(
                     tool_id=tool_id,
@@ -210,17 +293,14 @@ class RunProcessor:
             )
             
         except Exception as e:
-            logger.error(f"Error creating tool calls event: {e}")
+            logger.error("Error creating tool calls event: %s", e)
             return None
     
     def _create_message_event(self, thread_id: str, step) -> Optional[MessageEvent]:
         """Create message event - FETCH the actual message content."""
         try:
-            step_details = getattr(step, 'step_details', {})
-            if 'message_creation' not in step_details:
-                return None
-            
-            message_id = step_details['message_creation'].get('message_id')
+            step_details = step.step_details or {}
+            message_id = step_details.get('message_creation', {}).get('message_id')
             if not message_id:
                 return None
             
@@ -234,6 +314,6 @@ class RunProcessor:
             return None
             
         except Exception as e:
-            logger.error(f"Error creating message event: {e}")
+            logger.error("Error creating message event: %s", e)
             return None
 
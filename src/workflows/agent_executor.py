@@ -1,6 +1,4 @@
 import logging
-from typing import Dict, Any
-
 
 from ..agent_manager import AgentManager
 from ..run_processor import RunProcessor
@@ -8,7 +6,7 @@ from ..run_events import RequiresApprovalEvent
 
 from dataclasses import dataclass
 from agent_framework import (
-    Executor, ChatMessage, WorkflowContext, handler, executor, RequestInfoEvent, RequestResponse, AgentExecutorRequest, AgentExecutorResponse,
+    Executor, WorkflowContext, handler, RequestResponse,
     RequestInfoMessage
 )
 
@@ -41,7 +39,7 @@ class CustomAzureAgentExecutor(Executor):
         Returns the result in a format compatible with workflow framework.
         """
 
-        logger.info(f"Running agent with message: {user_message}")
+        logger.info("Running agent with message: %s", user_message)
 
         # Create and execute run
         if not self.run_id:
@@ -49,9 +47,9 @@ class CustomAzureAgentExecutor(Executor):
             self.processor = RunProcessor(self.agent_manager.agents_client)
 
 
-        for event in self.processor.poll_run_events(self.agent_manager.thread_id, self.run_id):
+        async for event in self.processor.poll_run_events_async(self.agent_manager.thread_id, self.run_id):
             if event.is_blocking and isinstance(event, RequiresApprovalEvent):
-                logger.info(f"Blocking event: {event}")
+                logger.info("Blocking event: %s", event)
                 if self.require_approval:
                     await ctx.send_message(ToolApprovalRequest(event=event))
                 else:
@@ -59,13 +57,17 @@ class CustomAzureAgentExecutor(Executor):
                     self.agent_manager.submit_approvals(event, approved=True)
                     await ctx.send_message("Tool approved")
                     return
-                logger.info(f"Added event: {event}")
+                logger.info("Added event: %s", event)
                 return
             else:
                 await ctx.yield_output(event)
-            logger.info(f"Yielded event: {event}")
+            logger.info("Yielded event: %s", event)
+
+        logger.info("Created run: %s", self.run_id)
 
-        logger.info(f"Created run: {self.run_id}")
+        # Run finished - the next message starts a new run on the same thread
+        self.run_id = None
+        self.processor = None
         
     @handler
     async def on_human_feedback(
@@ -79,8 +81,8 @@ class CustomAzureAgentExecutor(Executor):
         and the correlated ToolApprovalRequest with the approval event.
         """
 
-        logger.info(f"On human feedback: {feedback}")
-        logger.info(f"Context: {ctx}")
+        logger.info("On human feedback: %s", feedback)
+        logger.info("Context: %s", ctx)
         
         # Extract approval decision from feedback response
         approved = feedback.data == "approved"
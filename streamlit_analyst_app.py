@@ -1,23 +1,30 @@
 """Ultra simple chat - refactored with event stream architecture."""
 
-from src.workflows import agent_executor
 import streamlit as st
 import logging
 from src.config import get_config, get_mcp_config, setup_environment_variables, get_auth_config
-from src.constants import PROJ_ENDPOINT_KEY, AGENT_ID_KEY
-from src.mcp_client import get_mcp_token_sync, display_mcp_status
+from src.constants import PROJ_ENDPOINT_KEY, AGENT_ID_KEY, MCP_TOKEN_REFRESH_MARGIN_SECONDS
+from src.mcp_client import get_mcp_token_with_expiry
 from src.auth import initialize_msal_auth
 from src.agent_manager import AgentManager
 from src.run_processor import RunProcessor
-from src.event_renderer import EventRenderer, render_error_buttons
-from src.run_events import RequiresApprovalEvent, MessageEvent, ErrorEvent, ToolCallEvent, ToolCallsStepEvent
+from src.event_renderer import EventRenderer, render_message_history
+from src.run_events import UserMessage, MessageEvent, ToolCallsStepEvent
 from src.workflows.agent_executor import CustomAzureAgentExecutor
-from agent_framework import WorkflowBuilder, WorkflowOutputEvent, RequestInfoEvent, WorkflowFailedEvent, RequestInfoExecutor, WorkflowStatusEvent, WorkflowRunState
+from agent_framework import WorkflowBuilder, WorkflowOutputEvent, RequestInfoEvent, WorkflowFailedEvent, RequestInfoExecutor, WorkflowRunState
 import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 logging.basicConfig(level=logging.INFO, force=True)
 logger = logging.getLogger(__name__)
 
+# Live renderers for workflow output data, keyed by exact event class
+OUTPUT_RENDERERS = {
+    MessageEvent: EventRenderer.render_message_with_typing,
+    ToolCallsStepEvent: EventRenderer.render_tool_calls_step,
+}
+
 def on_tool_approve():
     """Handle tool approval."""
     # Send approval response to workflow
@@ -32,7 +39,7 @@ def on_tool_deny():
     # Send denial response to workflow
     st.session_state.approval_response = "denied"
     st.session_state.pending_approval = None
-    st.session_state.stage = 'user_input'
+    st.session_state.stage = 'processing'
     st.session_state.skip_run_stream = True
 
 
@@ -42,10 +49,10 @@ def on_error_retry(agent_manager: AgentManager):
     retry_message = "Please continue from where the previous attempt failed. Retry the last operation that encountered an error."
     
     # Add retry message to chat
-    st.session_state.messages.append({
-        "role": "user", 
-        "content": f"🔄 **Retrying previous request**"
-    })
+    st.session_state.messages.append(UserMessage(
+        role="user",
+        content=f"🔄 **Retrying previous request**"
+    ))
     
     # Create new run with retry instruction
     with st.spinner("Creating new run for retry...", show_time=True):
@@ -63,18 +70,6 @@ def on_error_cancel():
     st.session_state.processor = None
     st.session_state.error_event = None
 
-def render_message_history():
-    """Render message history from session state."""
-    for item in st.session_state.messages:
-        if isinstance(item, dict):
-            # User message - simple dict
-            with st.chat_message(item["role"]):
-                st.markdown(item["content"])
-        else:
-            # Assistant event - RunEvent object
-            with st.chat_message("assistant"):
-                EventRenderer.render(item)
-
 
 def initialize_app() -> None:
     """
@@ -132,53 +127,191 @@ def initialize_app() -> None:
         st.session_state.current_prompt = None
     if 'approval_response' not in st.session_state:
         st.session_state.approval_response = None
+    if 'seen_event_ids' not in st.session_state:
+        st.session_state.seen_event_ids = set()
+    if 'event_loop' not in st.session_state:
+        # One loop per session, reused across turns so async clients keep their pools
+        st.session_state.event_loop = asyncio.new_event_loop()
 
-
-def run_async_task(async_func, *args):
+def get_agent_manager() -> AgentManager:
     """
-    Run an asynchronous function in a new event loop.
+    Return the session's AgentManager, rebuilding it only when configuration changes.
 
-    Args:
-    async_func (coroutine): The asynchronous function to execute.
-    *args: Arguments to pass to the asynchronous function.
-
-    Returns:
-    None
+    The MCP token is refreshed in place shortly before it expires.
     """
-    
-    loop = None
-
-    try:
-        loop = asyncio.new_event_loop()
-        loop.run_until_complete(async_func(*args))
-    finally:
-        # Close the existing loop if open
-        if loop is not None:
-            loop.close()
-
-def create_workflow():
-    # Get MCP configuration and token
     config = get_config()
     mcp_config = get_mcp_config()
-    mcp_token = get_mcp_token_sync(mcp_config)
-
-    agent_manager = AgentManager(
-        project_endpoint=config[PROJ_ENDPOINT_KEY],
-        agent_id=config[AGENT_ID_KEY],
-        mcp_config=mcp_config,
-        mcp_token=mcp_token
-    )
-
-    agent_executor = CustomAzureAgentExecutor(agent_manager, require_approval=st.session_state.require_approval)
-    tool_approval_executor = RequestInfoExecutor(id="request_tool_approval")
-    return (
-        WorkflowBuilder()
-        .set_start_executor(agent_executor)
-            .add_edge(agent_executor, tool_approval_executor)
-            .add_edge(tool_approval_executor, agent_executor)
-            .add_edge(agent_executor, agent_executor)
-        .build()
-    )
+    key = (config[PROJ_ENDPOINT_KEY], config[AGENT_ID_KEY], tuple(sorted((mcp_config or {}).items())))
+
+    agent_manager = st.session_state.get('agent_manager')
+    if agent_manager is None or st.session_state.get('agent_manager_key') != key:
+        # Fetch the MCP token while the client and thread are being created
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            token_future = pool.submit(get_mcp_token_with_expiry, mcp_config)
+            agent_manager = AgentManager(
+                project_endpoint=config[PROJ_ENDPOINT_KEY],
+                agent_id=config[AGENT_ID_KEY],
+                mcp_config=mcp_config,
+                mcp_token=None
+            )
+            mcp_token, expires_on = token_future.result()
+        if mcp_token:
+            agent_manager.update_mcp_token(mcp_token)
+        st.session_state.agent_manager = agent_manager
+        st.session_state.agent_manager_key = key
+        st.session_state.mcp_token_expires_on = expires_on
+    elif mcp_config and st.session_state.mcp_token_expires_on - time.time() < MCP_TOKEN_REFRESH_MARGIN_SECONDS:
+        mcp_token, expires_on = get_mcp_token_with_expiry(mcp_config)
+        if mcp_token:
+            agent_manager.update_mcp_token(mcp_token)
+            st.session_state.mcp_token_expires_on = expires_on
+
+    return agent_manager
+
+def get_workflow():
+    """
+    Return the session's workflow, rebuilding it only when the agent thread changes.
+    """
+    agent_manager = get_agent_manager()
+
+    if st.session_state.get('workflow_thread_id') != agent_manager.thread_id:
+        agent_executor = CustomAzureAgentExecutor(agent_manager, require_approval=st.session_state.require_approval)
+        tool_approval_executor = RequestInfoExecutor(id="request_tool_approval")
+        st.session_state.agent_executor = agent_executor
+        st.session_state.cached_workflow = (
+            WorkflowBuilder()
+            .set_start_executor(agent_executor)
+                .add_edge(agent_executor, tool_approval_executor)
+                .add_edge(tool_approval_executor, agent_executor)
+                .add_edge(agent_executor, agent_executor)
+            .build()
+        )
+        st.session_state.workflow_thread_id = agent_manager.thread_id
+
+    # The approval checkbox can change between prompts
+    st.session_state.agent_executor.require_approval = st.session_state.require_approval
+    return st.session_state.cached_workflow
+
+
+def handle_approval(ss) -> None:
+    """Render the pending tool approval request (blocking state)."""
+    event = ss.pending_approval.data.event
+    with st.chat_message("assistant"):
+        EventRenderer.render_approval_request(event,
+                                            lambda e: on_tool_approve(),
+                                            lambda e: on_tool_deny())
+
+
+def handle_user_input(ss) -> None:
+    """Accept a new prompt and start processing it in the same script run."""
+    if prompt := st.chat_input("Say something:"):
+        # User message - UserMessage tuple (not an event)
+        ss.messages.append(UserMessage(role="user", content=prompt))
+        
+        with st.chat_message("user"):
+            st.markdown(prompt)
+        
+        with st.spinner("Thinking...", show_time=True):
+            workflow = get_workflow()
+            ss.stage = 'processing'
+            ss.workflow = workflow
+            ss.current_prompt = prompt
+            ss.skip_run_stream = False
+            ss.seen_event_ids = set()
+
+        handle_processing(ss)
+
+
+async def run_workflow_stream(ss) -> None:
+    """Drain workflow events for the current prompt or approval response into the UI."""
+    with st.chat_message("assistant"):
+        # Check if we should skip the initial stream setup (e.g., after approval)
+        if not ss.get('skip_run_stream', False):
+            with st.spinner("Thinking...", show_time=True):
+                events = ss.workflow.run_stream(ss.current_prompt)
+        else:
+            responses: dict[str, str] = {}
+            responses[ss.pending_approval_id] = ss.approval_response
+            events =ss.workflow.send_responses_streaming(responses)
+        
+        # Reset the skip flag
+        ss.skip_run_stream = False
+
+        # Bind session state lookups once; write back only on state transitions
+        push = ss.messages.append
+        seen = ss.seen_event_ids
+        last_event = None
+
+        # One spinner for the whole drain instead of one per event
+        with st.spinner("Processing...", show_time=True):
+            async for event in events:
+                logger.info("Event: %s", event)
+                last_event = event
+                if type(event) is WorkflowOutputEvent:
+                    render = OUTPUT_RENDERERS.get(type(event.data))
+                    # Skip events already rendered earlier in this turn (e.g. replayed after approval)
+                    if render and event.data.event_id not in seen:
+                        seen.add(event.data.event_id)
+                        render(event.data)
+                        push(event.data)
+                    
+                if (isinstance(event, RequestInfoEvent)):
+                    ss.pending_approval = event
+                    ss.pending_approval_id = event.request_id
+                    ss.events = events
+                    #st.rerun()
+                    break;
+
+                if (isinstance(event, WorkflowFailedEvent)):
+                    ss.error_event = event
+                    ss.stage = 'error'
+                    #st.rerun()
+                    break;
+
+        async for event in events:
+            last_event = event
+        ss.last_event = last_event
+        logger.info("✅ 1. Run completed, resetting state")
+        #st.rerun()
+        #return;
+
+
+def handle_processing(ss) -> None:
+    """Stream workflow events for the current prompt or approval response."""
+    if not ss.workflow:
+        return
+
+    # Reuse the session loop rather than building a new one per rerun
+    loop = ss.event_loop
+    asyncio.set_event_loop(loop)
+    loop.run_until_complete(run_workflow_stream(ss))
+
+    logger.info("✅ Exited run_workflow_stream")
+
+    if ss.last_event is not None and \
+        ss.last_event.state!=WorkflowRunState.IDLE and ss.last_event.state!=WorkflowRunState.CANCELLED \
+        and ss.last_event.state!=WorkflowRunState.FAILED:
+        st.rerun()
+        return
+    # st.rerun()
+    # return
+
+    # Run completed - reset state
+    logger.info("✅ 2. Run completed, resetting state")
+    ss.stage = 'user_input'
+    ss.run_id = None
+    ss.processor = None
+    ss.workflow = None
+    ss.current_prompt = None
+    st.rerun()
+
+
+STAGE_HANDLERS = {
+    'approval': handle_approval,
+    'user_input': handle_user_input,
+    'processing': handle_processing,
+}
+
 
 def main():
     st.title("🤖 Ultra Simple Chat")
@@ -188,118 +321,14 @@ def main():
 
     
     # Display message history
-    render_message_history()
-    
-    # Handle pending approval (blocking state)
-    if st.session_state.pending_approval:
-        event = st.session_state.pending_approval.data.event
-        with st.chat_message("assistant"):
-            EventRenderer.render_approval_request(event,
-                                                lambda e: on_tool_approve(),
-                                                lambda e: on_tool_deny())
-        return
-    
-    # Handle user input
-    if st.session_state.stage == 'user_input':
-        if prompt := st.chat_input("Say something:"):
-            # User message - simple dict (not an event)
-            st.session_state.messages.append({"role": "user", "content": prompt})
-            
-            with st.chat_message("user"):
-                st.markdown(prompt)
-            
-            with st.spinner("Thinking...", show_time=True):
-                workflow = create_workflow()
-                st.session_state.stage = 'processing'
-                st.session_state.workflow = workflow
-                st.session_state.current_prompt = prompt
-                st.session_state.skip_run_stream = False
-
-    # Process run events
-    if st.session_state.stage == 'processing' and st.session_state.workflow:
-        async def run_workflow_stream():
-            with st.chat_message("assistant"):
-                # Check if we should skip the initial stream setup (e.g., after approval)
-                if not st.session_state.get('skip_run_stream', False):
-                    with st.spinner("Thinking...", show_time=True):
-                        events = st.session_state.workflow.run_stream(st.session_state.current_prompt)
-                else:
-                    responses: dict[str, str] = {}
-                    responses[st.session_state.pending_approval_id] = st.session_state.approval_response
-                    events =st.session_state.workflow.send_responses_streaming(responses)
-                
-                # Reset the skip flag
-                st.session_state.skip_run_stream = False
-
-                st.session_state.last_event = None
-
-                events_exhausted = False
-            
-                while not events_exhausted:
-                    event = None
-                    with st.spinner("Processing...", show_time=True):
-                        try:
-                            event = await anext(events)
-                        except StopAsyncIteration as e:
-                            events_exhausted = True
-                            continue;
-
-                    logger.info(f"Event: {event}")
-                    st.session_state.last_event = event
-                    if isinstance(event, WorkflowOutputEvent):
-                        if isinstance(event.data, MessageEvent):
-                            EventRenderer.render_message_with_typing(event.data)
-                            st.session_state.messages.append(event.data)
-                        elif isinstance(event.data, ToolCallsStepEvent):
-                            EventRenderer.render(event.data)
-                            st.session_state.messages.append(event.data)
-                        
-                    if (isinstance(event, RequestInfoEvent)):
-                        st.session_state.pending_approval = event
-                        st.session_state.pending_approval_id = event.request_id
-                        st.session_state.events = events
-                        #st.rerun()
-                        break;
-
-                    if (isinstance(event, WorkflowFailedEvent)):
-                        st.session_state.error_event = event
-                        st.session_state.stage = 'error'
-                        #st.rerun()
-                        break;
-
-                async for event in events:
-                    st.session_state.last_event = event
-                logger.info("✅ 1. Run completed, resetting state")
-                #st.rerun()
-                #return;
+    render_message_history(st.session_state.messages)
     
-        # Создать loop один раз и сохранить
-        if 'event_loop' not in st.session_state or st.session_state.event_loop is None:
-            st.session_state.event_loop = asyncio.new_event_loop()
-
-        loop = st.session_state.event_loop
-        asyncio.set_event_loop(loop)
-        loop.run_until_complete(run_workflow_stream())
-
-        logger.info("✅ Exited run_workflow_stream")
-
-        if st.session_state.last_event is not None and \
-            st.session_state.last_event.state!=WorkflowRunState.IDLE and st.session_state.last_event.state!=WorkflowRunState.CANCELLED \
-            and st.session_state.last_event.state!=WorkflowRunState.FAILED:
-            st.rerun()
-            return
-        # st.rerun()
-        # return
-
-        # Run completed - reset state
-        logger.info("✅ 2. Run completed, resetting state")
-        st.session_state.stage = 'user_input'
-        st.session_state.run_id = None
-        st.session_state.processor = None
-        st.session_state.workflow = None
-        st.session_state.current_prompt = None
-        st.session_state.event_loop = None
-        st.rerun()
+    # Dispatch on the current stage; a pending approval blocks everything else
+    ss = st.session_state
+    stage = 'approval' if ss.pending_approval else ss.stage
+    handler = STAGE_HANDLERS.get(stage)
+    if handler:
+        handler(ss)
 
 if __name__ == "__main__":
     main()
@@ -1,6 +1,5 @@
 """Ultra simple chat - refactored with event stream architecture."""
 
-from tracemalloc import stop
 import streamlit as st
 import logging
 from src.config import get_config, get_mcp_config, setup_environment_variables, get_auth_config
@@ -9,12 +8,15 @@ from src.mcp_client import get_mcp_token_sync, display_mcp_status
 from src.auth import initialize_msal_auth
 from src.agent_manager import AgentManager
 from src.run_processor import RunProcessor
-from src.event_renderer import EventRenderer, render_error_buttons
-from src.run_events import RequiresApprovalEvent, MessageEvent, ErrorEvent, ToolCallEvent
+from src.event_renderer import EventRenderer, render_error_buttons, render_message_history
+from src.run_events import UserMessage, RequiresApprovalEvent, MessageEvent, ErrorEvent
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Terminal events are shown live but not kept in history
+_SKIP_HISTORY_EVENT_TYPES = frozenset({'completed', 'error'})
+
 def on_tool_approve(event: RequiresApprovalEvent, agent_manager: AgentManager):
     """Handle tool approval."""
     if agent_manager.submit_approvals(event, approved=True):
@@ -40,10 +42,10 @@ def on_error_retry(agent_manager: AgentManager):
     retry_message = "Please continue from where the previous attempt failed. Retry the last operation that encountered an error."
     
     # Add retry message to chat
-    st.session_state.messages.append({
-        "role": "user", 
-        "content": f"🔄 **Retrying previous request**"
-    })
+    st.session_state.messages.append(UserMessage(
+        role="user",
+        content=f"🔄 **Retrying previous request**"
+    ))
     
     # Create new run with retry instruction
     with st.spinner("Creating new run for retry...", show_time=True):
@@ -61,18 +63,6 @@ def on_error_cancel():
     st.session_state.processor = None
     st.session_state.error_event = None
 
-def render_message_history():
-    """Render message history from session state."""
-    for item in st.session_state.messages:
-        if isinstance(item, dict):
-            # User message - simple dict
-            with st.chat_message(item["role"]):
-                st.markdown(item["content"])
-        else:
-            # Assistant event - RunEvent object
-            with st.chat_message("assistant"):
-                EventRenderer.render(item)
-
 
 def initialize_app() -> AgentManager:
     """
@@ -160,7 +150,7 @@ def main():
     agent_manager = initialize_app()
     
     # Display message history
-    render_message_history()
+    render_message_history(st.session_state.messages)
     
     # Handle pending approval (blocking state)
     if st.session_state.pending_approval:
@@ -185,8 +175,8 @@ def main():
     # Handle user input
     if st.session_state.stage == 'user_input':
         if prompt := st.chat_input("Say something:"):
-            # User message - simple dict (not an event)
-            st.session_state.messages.append({"role": "user", "content": prompt})
+            # User message - UserMessage tuple (not an event)
+            st.session_state.messages.append(UserMessage(role="user", content=prompt))
             
             with st.chat_message("user"):
                 st.markdown(prompt)
@@ -214,6 +204,7 @@ def main():
                 run_id=st.session_state.run_id
             )
 
+            push = st.session_state.messages.append
             events_exhausted = False
             
             while not events_exhausted:
@@ -225,7 +216,7 @@ def main():
                         events_exhausted = True
                         continue;
                 
-                logger.info(f"📦 Received event: {event.event_type} (id: {event.event_id})")
+                logger.info("📦 Received event: %s (id: %s)", event.event_type, event.event_id)
                 
                 # Handle blocking event
                 if event.is_blocking:
@@ -257,8 +248,8 @@ def main():
                     return
                 
                 # Store event in history (skip completion/error events)
-                if event.event_type not in ['completed', 'error']:
-                    st.session_state.messages.append(event)
+                if event.event_type not in _SKIP_HISTORY_EVENT_TYPES:
+                    push(event)
         
         # Run completed - reset state
         logger.info("✅ Run completed, resetting state")